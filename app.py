@@ -1,88 +1,264 @@
 from flask import Flask, request, jsonify, send_file, make_response
 from flask_cors import CORS
 import os
-import json
 import io
 import math
+import time
+import atexit
+import threading
+import uuid
+import orjson
+import numpy as np
 import pandas as pd
-from fpdf import FPDF
-from utils.hashing import HashTable, rebuild_hashtable_from_list
-from utils.searching import search_by_id, search_by_name
+from flask_orjson import OrjsonProvider
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from utils.hashing import EMPTY, HashTable, is_valid_id, rebuild_hashtable_from_list
+from utils.searching import search_by_id, search_by_name, dynamic_search
 from utils.sorting import sort_employees_by_percentage
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(APP_DIR, "database.json")
+DB_TMP_PATH = DB_PATH + ".tmp"
+SAVE_DELAY_SECONDS = 0.2  # coalesce uploads arriving within this window into one write
+SAVE_RETRY_SECONDS = 5  # back off this long after a failed write before retrying
+BOOT_ID = uuid.uuid4().hex[:8]  # part of every ETag, so tags from an earlier process never match
 HASH_TABLE_SIZE = 100  # change if you want larger table
+RECORD_COLUMNS = ["id", "name", "department", "attendance", "total_days"]
+PDF_ROWS_PER_TABLE = 500  # rows per platypus Table chunk in the PDF export
+PDF_CACHE_SIZE = 32  # rendered PDFs kept for the current table version
+PDF_TITLE_STYLE = ParagraphStyle("pdf-title", fontName="Helvetica", fontSize=12, leading=14, alignment=TA_CENTER)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Initialize in-memory store + hash table
 if not os.path.exists(DB_PATH):
-    with open(DB_PATH, "w") as f:
-        json.dump([], f, indent=2)
+    with open(DB_PATH, "wb") as f:
+        f.write(orjson.dumps([], option=orjson.OPT_INDENT_2))
 
-with open(DB_PATH, "r") as f:
+with open(DB_PATH, "rb") as f:
     try:
-        database = json.load(f)
+        database = orjson.loads(f.read())
     except Exception:
         database = []
 
 # Build hash table from stored database
 hash_table = HashTable(size=HASH_TABLE_SIZE)
-rebuild_hashtable_from_list(hash_table, database)
+skipped = rebuild_hashtable_from_list(hash_table, database)
+if skipped:
+    app.logger.warning("Skipped %d stored record(s) with ids outside the int64 range (dropped on next save): %s",
+                       len(skipped), [r.get("id") for r in skipped])
+
+# table_lock guards hash_table mutations and reads (derived views are built lazily,
+# and the server may run several threads), write_lock serializes writers of database.json
+table_lock = threading.Lock()
+write_lock = threading.Lock()
+db_dirty = threading.Event()
+pdf_cache = {}  # percent -> (hash_table.version, PDF bytes), current version only
+
+
+def flush_database():
+    """
+    Persist flattened entries from hash table to database.json if anything changed
+    (keeps stable ordering as list of stored items).
+    Writes to a temp file first and swaps it in, so the file is never half-written.
+    """
+    with write_lock:
+        if not db_dirty.is_set():
+            return
+        db_dirty.clear()
+        with table_lock:
+            entries = hash_table.flatten()
+        try:
+            with open(DB_TMP_PATH, "wb") as f:
+                f.write(orjson.dumps(entries, option=orjson.OPT_INDENT_2))
+            os.replace(DB_TMP_PATH, DB_PATH)
+        except Exception:
+            # still stale: keep the flag so the writer / atexit flush tries again
+            db_dirty.set()
+            if os.path.exists(DB_TMP_PATH):
+                os.remove(DB_TMP_PATH)
+            raise
+
+
+def _database_writer():
+    """Background loop: wait for changes, batch them briefly, then flush"""
+    while True:
+        db_dirty.wait()
+        time.sleep(SAVE_DELAY_SECONDS)
+        try:
+            flush_database()
+        except Exception as e:
+            app.logger.error("Failed to save database: %s", e)
+            time.sleep(SAVE_RETRY_SECONDS)
 
 
 def save_database_from_hashtable():
     """
-    Persist flattened entries from hash table to database.json
-    (keeps stable ordering as list of stored items)
+    Mark database.json as stale; the background writer persists it shortly after.
     """
-    entries = [entry for entry in hash_table.flatten() if entry is not None]
-    with open(DB_PATH, "w") as f:
-        json.dump(entries, f, indent=2)
+    db_dirty.set()
 
 
-def process_records(raw_list):
+threading.Thread(target=_database_writer, name="database-writer", daemon=True).start()
+atexit.register(flush_database)
+
+
+def _to_count(value):
     """
-    Accepts list of dicts with keys:
-    id, name, department, attendance, total_days
-    Returns list of processed records (with attendance_percentage and hash_index)
-    and inserts them into hash_table (replacing same id if present).
+    One attendance / total_days cell as int (floats truncate, as with int()).
+    Missing or non-numeric cells count as 0; non-finite or out-of-int64 values
+    give None so the row is skipped.
     """
-    processed = []
-    for rec in raw_list:
+    if isinstance(value, str):
         try:
-            emp_id = int(rec.get("id"))
-            name = str(rec.get("name", "")).strip()
-            dept = str(rec.get("department", "")).strip()
-            attendance = int(rec.get("attendance", 0))
-            total_days = int(rec.get("total_days", 0)) if rec.get("total_days") is not None else 0
-        except Exception:
-            continue
+            value = int(value)
+        except ValueError:
+            try:
+                value = float(value)
+            except ValueError:
+                return 0
+    if isinstance(value, float) and math.isnan(value):
+        return 0
+    try:
+        count = int(value)
+    except OverflowError:
+        return None
+    except (TypeError, ValueError):
+        return 0
+    return count if -2**63 <= count < 2**63 else None
+
+
+def _numeric_column(df, column):
+    """Coerce a count column to Int64, with <NA> for values that must be skipped (see _to_count)"""
+    col = df[column]
+    if pd.api.types.is_signed_integer_dtype(col):
+        return col.astype("Int64")
+    if pd.api.types.is_float_dtype(col):
+        # vectorized path (e.g. Excel columns with blanks); abs() < 2**63 is False for +-inf
+        col = col.fillna(0)
+        ok = col.abs() < 2**63
+        return col.where(ok, 0).astype(np.int64).astype("Int64").where(ok)
+    # object columns: convert each value exactly instead of going through float64
+    return pd.Series(pd.array([_to_count(v) for v in col], dtype="Int64"), index=col.index)
+
+
+def _to_id(value):
+    """
+    Employee id as int, or None when the value is not an integral number the table can hold.
+    Strings must be integer literals, as with int() ("12.5" and "1e3" are rejected).
+    """
+    if isinstance(value, float) and not value.is_integer():
+        return None
+    try:
+        emp_id = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return emp_id if is_valid_id(emp_id) else None
+
+
+def _id_column(df):
+    """Coerce the id column to Int64, with <NA> for ids that must be skipped"""
+    ids = df["id"]
+    if pd.api.types.is_signed_integer_dtype(ids):
+        # already exact integers; only the EMPTY sentinel value is out of range
+        return ids.astype(np.int64).where(ids != EMPTY).astype("Int64")
+    # object / float columns: check each value exactly instead of going through float64
+    return pd.Series(pd.array([_to_id(v) for v in ids], dtype="Int64"), index=ids.index)
 
-        percent = 0.0
-        if total_days > 0:
-            percent = round((attendance / total_days) * 100, 1)
-        hash_idx = emp_id % HASH_TABLE_SIZE
 
-        record = {
+def _text_column(df, column):
+    """Coerce a column to stripped strings, treating missing cells as empty"""
+    return df[column].fillna("").astype(str).str.strip().tolist()
+
+
+def process_records(raw_records):
+    """
+    Accepts list of dicts (or a DataFrame) with keys:
+    id, name, department, attendance, total_days
+    Returns list of processed records (with attendance_percentage and hash_index)
+    and inserts them into hash_table (replacing same id if present).
+    Records without an integral id inside the int64 range, or with non-finite /
+    out-of-int64 attendance or total_days, are skipped.
+    """
+    if isinstance(raw_records, pd.DataFrame):
+        df = raw_records
+    else:
+        df = pd.DataFrame([rec for rec in raw_records if isinstance(rec, dict)])
+    df = df.reindex(columns=RECORD_COLUMNS)
+
+    ids = _id_column(df)
+    attendance = _numeric_column(df, "attendance")
+    total_days = _numeric_column(df, "total_days")
+    keep = (ids.notna() & attendance.notna() & total_days.notna()).to_numpy()
+    df = df[keep]
+
+    id_arr = ids[keep].to_numpy(dtype=np.int64)
+    attendance = attendance[keep].to_numpy(dtype=np.int64)
+    total_days = total_days[keep].to_numpy(dtype=np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(total_days > 0, np.round(attendance / total_days * 100, 1), 0.0)
+
+    processed = [
+        {
             "id": emp_id,
             "name": name,
             "department": dept,
-            "attendance": attendance,
-            "total_days": total_days,
-            "attendance_percentage": percent,
-            "hash_index": hash_idx
+            "attendance": att,
+            "total_days": days,
+            "attendance_percentage": pct
         }
-
-        hash_table.insert(record)
-        processed.append(record)
+        for emp_id, name, dept, att, days, pct in zip(
+            id_arr.tolist(),
+            _text_column(df, "name"),
+            _text_column(df, "department"),
+            attendance.tolist(),
+            total_days.tolist(),
+            percent.tolist(),
+        )
+    ]
+
+    # the table fills in hash_index (home bucket for its current, possibly grown, size)
+    with table_lock:
+        hash_table.bulk_insert(processed)
 
     save_database_from_hashtable()
     return processed
 
 
+def indices_above(percent):
+    """flatten() positions with attendance_percentage >= percent (one vector compare over the column)"""
+    return np.flatnonzero(hash_table.percentages() >= percent).tolist()
+
+
+def records_above(percent):
+    """Records with attendance_percentage >= percent, in flatten() order"""
+    all_records = hash_table.flatten()
+    return [all_records[i] for i in indices_above(percent)]
+
+
+def versioned_json(build):
+    """
+    jsonify(build()) tagged with an ETag derived from hash_table.version.
+    If the client already holds that version (If-None-Match), answer 304
+    without building or serializing the payload.
+    """
+    with table_lock:
+        etag = f"{BOOT_ID}-{hash_table.version}"
+        not_modified = request.if_none_match.contains_weak(etag)
+        payload = None if not_modified else build()
+    response = make_response("", 304) if not_modified else jsonify(payload)
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, must-revalidate"
+    return response
+
+
 # ✅ Root route to confirm backend is active
 @app.route("/", methods=["GET"])
 def home():
@@ -107,25 +283,25 @@ def upload():
 
     if filename.endswith(".json"):
         try:
-            file_json = json.load(file)
-            if not isinstance(file_json, list):
-                return jsonify({"status": "error", "message": "JSON must be an array of records"}), 400
-            processed = process_records(file_json)
-            return jsonify({"status": "success", "count": len(processed), "data": processed}), 200
+            # parse the whole file before inserting anything, so a malformed file changes nothing
+            file_json = orjson.loads(file.read())
         except Exception as e:
             return jsonify({"status": "error", "message": f"Invalid JSON file: {str(e)}"}), 400
+        if not isinstance(file_json, list):
+            return jsonify({"status": "error", "message": "JSON must be an array of records"}), 400
+        processed = process_records(file_json)
+        return jsonify({"status": "success", "count": len(processed), "data": processed}), 200
 
     if filename.endswith(".xlsx") or filename.endswith(".xls"):
         try:
-            df = pd.read_excel(file)
-            df_columns = [c.lower() for c in df.columns]
-            required = {"id", "name", "department", "attendance", "total_days"}
-            if not required.issubset(set(df_columns)):
+            # calamine (Rust) parses both .xlsx and .xls without building openpyxl cell objects
+            df = pd.read_excel(file, engine="calamine")
+            df.columns = df.columns.astype(str).str.lower()
+            required = set(RECORD_COLUMNS)
+            if not required.issubset(set(df.columns)):
                 return jsonify({"status": "error", "message": f"Excel must contain columns: {required}"}), 400
 
-            df.columns = [c.lower() for c in df.columns]
-            records = df.to_dict(orient="records")
-            processed = process_records(records)
+            processed = process_records(df)
             return jsonify({"status": "success", "count": len(processed), "data": processed}), 200
         except Exception as e:
             return jsonify({"status": "error", "message": f"Failed to parse Excel: {str(e)}"}), 400
@@ -135,19 +311,18 @@ def upload():
 
 @app.route("/view", methods=["GET"])
 def view_all():
-    all_records = [r for r in hash_table.flatten() if r is not None]
-    return jsonify(all_records), 200
+    return versioned_json(hash_table.flatten)
 
 
 @app.route("/hashview", methods=["GET"])
 def hash_view():
-    table = hash_table.as_list()
-    return jsonify(table), 200
+    return versioned_json(hash_table.as_list)
 
 
 @app.route("/search/id/<int:emp_id>", methods=["GET"])
 def api_search_id(emp_id):
-    result, steps = search_by_id(hash_table, emp_id)
+    with table_lock:
+        result, steps = search_by_id(hash_table, emp_id)
     if result is None:
         return jsonify({"found": False, "trace": steps}), 404
     return jsonify({"found": True, "trace": steps, "record": result}), 200
@@ -155,7 +330,8 @@ def api_search_id(emp_id):
 
 @app.route("/search/name/<string:name>", methods=["GET"])
 def api_search_name(name):
-    results, steps = search_by_name(hash_table, name)
+    with table_lock:
+        results, steps = search_by_name(hash_table, name)
     if not results:
         return jsonify({"found": False, "trace": steps}), 404
     return jsonify({"found": True, "trace": steps, "records": results}), 200
@@ -168,19 +344,12 @@ def api_dynamic_search():
     Dynamic search by id, name, and department.
     Example: /search/dynamic?name=go&id=12&department=cse
     """
-    all_records = [r for r in hash_table.flatten() if r is not None]
     id_query = request.args.get("id", "").strip().lower()
     name_query = request.args.get("name", "").strip().lower()
     dept_query = request.args.get("department", "").strip().lower()
 
-    results = []
-    for r in all_records:
-        if (
-            (not id_query or id_query in str(r.get("id", "")).lower())
-            and (not name_query or name_query in str(r.get("name", "")).lower())
-            and (not dept_query or dept_query in str(r.get("department", "")).lower())
-        ):
-            results.append(r)
+    with table_lock:
+        results = dynamic_search(hash_table, id_query, name_query, dept_query)
 
     return jsonify(results), 200
 
@@ -190,54 +359,75 @@ def api_sort(order):
     order = order.lower()
     if order not in ("asc", "desc"):
         return jsonify({"status": "error", "message": "order must be 'asc' or 'desc'"}), 400
-    all_records = [r for r in hash_table.flatten() if r is not None]
-    sorted_list = sort_employees_by_percentage(all_records, order)
-    return jsonify(sorted_list), 200
+    return versioned_json(lambda: sort_employees_by_percentage(hash_table.flatten(), order, hash_table.percentages()))
 
 
 @app.route("/filter/above/<int:percent>", methods=["GET"])
 def api_filter(percent):
-    all_records = [r for r in hash_table.flatten() if r is not None]
-    filtered = [r for r in all_records if r.get("attendance_percentage", 0) >= percent]
-    return jsonify(filtered), 200
+    return versioned_json(lambda: records_above(percent))
 
 
-@app.route("/download/pdf/<int:percent>", methods=["GET"])
-def api_download_pdf(percent):
-    all_records = [r for r in hash_table.flatten() if r is not None]
-    filtered = [r for r in all_records if r.get("attendance_percentage", 0) >= percent]
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, f"Employees with attendance >= {percent}%", ln=True, align="C")
-    pdf.ln(4)
+def _pdf_bytes(percent):
+    """
+    PDF of employees with attendance >= percent.
+    Repeat downloads are served from pdf_cache until the table changes;
+    a new table version drops every cached PDF of the old one.
+    """
+    with table_lock:
+        version = hash_table.version
+        cached = pdf_cache.get(percent)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        all_records = hash_table.flatten()
+        idx = indices_above(percent)
 
-    col_widths = [20, 50, 35, 25, 25]
     headers = ["ID", "Name", "Department", "Attendance %", "Hash Index"]
-    for i, h in enumerate(headers):
-        pdf.cell(col_widths[i], 8, h, border=1)
-    pdf.ln()
-
-    for r in filtered:
-        pdf.cell(col_widths[0], 8, str(r.get("id", "")), border=1)
-        pdf.cell(col_widths[1], 8, str(r.get("name", ""))[:30], border=1)
-        pdf.cell(col_widths[2], 8, str(r.get("department", ""))[:20], border=1)
-        pdf.cell(col_widths[3], 8, str(r.get("attendance_percentage", "")), border=1)
-        pdf.cell(col_widths[4], 8, str(r.get("hash_index", "")), border=1)
-        pdf.ln()
+    rows = [
+        [
+            str(r.get("id", "")),
+            str(r.get("name", ""))[:30],
+            str(r.get("department", ""))[:20],
+            str(r.get("attendance_percentage", "")),
+            str(r.get("hash_index", "")),
+        ]
+        for r in (all_records[i] for i in idx)
+    ]
+
+    # reportlab re-splits the remainder of a Table at every page break (quadratic in rows),
+    # so lay the grid out as fixed-size Tables; repeatRows keeps the header on every page
+    col_widths = [w * mm for w in (20, 50, 35, 25, 25)]
+    style = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black)])
+    tables = [
+        Table([headers] + rows[k:k + PDF_ROWS_PER_TABLE], colWidths=col_widths, style=style, repeatRows=1)
+        for k in range(0, max(len(rows), 1), PDF_ROWS_PER_TABLE)
+    ]
+    title = Paragraph(f"Employees with attendance &gt;= {percent}%", PDF_TITLE_STYLE)
 
     pdf_output = io.BytesIO()
-    pdf.output(pdf_output)
-    pdf_output.seek(0)
+    doc = SimpleDocTemplate(pdf_output, pagesize=A4, leftMargin=10 * mm, rightMargin=10 * mm, topMargin=15 * mm, bottomMargin=15 * mm)
+    doc.build([title, Spacer(1, 4 * mm)] + tables)
+    pdf = pdf_output.getvalue()
+
+    with table_lock:
+        if hash_table.version == version:
+            stale = [p for p, (v, _) in pdf_cache.items() if v != version]
+            for p in stale:
+                del pdf_cache[p]
+            if len(pdf_cache) >= PDF_CACHE_SIZE:
+                del pdf_cache[next(iter(pdf_cache))]
+            pdf_cache[percent] = (version, pdf)
+    return pdf
 
-    response = make_response(pdf_output.read())
+
+@app.route("/download/pdf/<int:percent>", methods=["GET"])
+def api_download_pdf(percent):
+    response = make_response(_pdf_bytes(percent))
     response.headers.set('Content-Type', 'application/pdf')
     response.headers.set('Content-Disposition', 'attachment', filename=f'employees_{percent}_percent.pdf')
     return response
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=7077, debug=True)
+    # development server only; production runs under gunicorn (see gunicorn_conf.py)
+    app.run(host="0.0.0.0", port=7077, debug=os.getenv("FLASK_ENV") == "development")
 
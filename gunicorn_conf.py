@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for production.
+Run with: gunicorn -c gunicorn_conf.py app:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7077')}"
+
+# Always exactly one worker: the hash table lives in process memory, so extra workers
+# would each hold their own copy, miss each other's uploads and race on database.json.
+# WEB_CONCURRENCY (set automatically by some hosts) is deliberately not read here.
+# Scale with GUNICORN_THREADS instead; app.table_lock keeps the table consistent across them.
+workers = 1
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 2 * (os.cpu_count() or 1) + 1))
+
+# app.py starts the database writer thread at import and threads don't survive fork,
+# so the app is loaded inside the worker rather than preloaded in the master.
+preload_app = False
@@ -0,0 +1,87 @@
+"""
+bulk_insert() must leave the table exactly as calling insert() once per record would,
+and both must keep the slot arrays and the id -> slot index consistent.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from utils.hashing import EMPTY, MAX_LOAD_FACTOR, HashTable, probe
+
+
+def make_records(ids):
+    return [{"id": emp_id, "name": f"emp {emp_id}", "attendance": n, "total_days": 30} for n, emp_id in enumerate(ids)]
+
+
+def assert_consistent(table):
+    occupied = np.flatnonzero(table.ids != EMPTY).tolist()
+    assert sorted(table._index.values()) == occupied
+    assert len(table._index) <= table.size * MAX_LOAD_FACTOR
+    for pos in range(table.size):
+        assert (table.records[pos] is None) == (pos not in occupied)
+    for emp_id, pos in table._index.items():
+        assert table.ids[pos] == emp_id
+        assert table.records[pos]["id"] == emp_id
+        assert table.records[pos]["hash_index"] == emp_id % table.size
+        # reachable by linear probing from its home bucket (no empty slot in between)
+        assert probe(table.ids, emp_id, table.size) == pos
+        record, trace = table.get(emp_id)
+        assert record is table.records[pos]
+        assert trace[-1]["index"] == pos
+
+
+def contents(table):
+    # slots may differ (growth rehashes at different moments), stored records must not
+    return table.size, [dict(r) for r in table.flatten()]
+
+
+ID_SETS = {
+    "growth": list(range(0, 500, 3)),
+    "collisions": [k * 10 for k in range(60)] + [k * 10 + 1 for k in range(60)],
+    "duplicates": [5, 15, 25, 5, 35, 15, 5, 45] * 3,
+    "negative": [-1, -10, -11, 9, -2**63 + 1, 2**63 - 1, 0, -20, 10],
+    "random": random.Random(0).sample(range(-10**6, 10**6), 300),
+}
+
+
+@pytest.mark.parametrize("name", sorted(ID_SETS))
+@pytest.mark.parametrize("preload", [0, 6])
+def test_bulk_insert_matches_repeated_insert(name, preload):
+    ids = ID_SETS[name]
+    existing = make_records(range(preload))
+
+    one_by_one = HashTable(size=10)
+    for r in make_records(range(preload)) + make_records(ids):
+        one_by_one.insert(r)
+
+    bulk = HashTable(size=10)
+    for r in existing:
+        bulk.insert(r)
+    bulk.bulk_insert(make_records(ids))
+
+    assert contents(bulk) == contents(one_by_one)
+    assert_consistent(bulk)
+    assert_consistent(one_by_one)
+
+
+def test_bulk_insert_repeated_id_keeps_last_record():
+    table = HashTable(size=10)
+    records = make_records([7, 17, 7])
+    table.bulk_insert(records)
+    assert table.get(7)[0] is records[2]
+    assert [r["id"] for r in table.flatten()] == [7, 17]
+    assert_consistent(table)
+
+
+def test_bulk_insert_rejects_out_of_range_id_without_changes():
+    table = HashTable(size=10)
+    table.bulk_insert(make_records([1, 2]))
+    before = (contents(table), table.ids.tolist())
+    with pytest.raises(ValueError):
+        table.bulk_insert(make_records([3, EMPTY]))
+    with pytest.raises(ValueError):
+        table.bulk_insert(make_records([3, 2**63]))
+    assert (contents(table), table.ids.tolist()) == before
+    assert_consistent(table)
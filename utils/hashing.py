@@ -1,14 +1,87 @@
 """
 Simple hash table implementation using open addressing with linear probing.
 Stores employee records (dicts). For simplicity we store whole record in slot.
+The slots are split into an int64 `ids` array (probed by a Numba-compiled loop)
+and a parallel `records` list; an id -> slot dict skips probing for known ids.
+The table doubles in size once it is more than 70% full, so probe chains stay short.
+Each stored record's "hash_index" is kept equal to its home bucket for the current size.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from numba import njit
+
+EMPTY = -2**63  # id sentinel for an unused slot (int64 min, so negative ids still work)
+MAX_ID = 2**63 - 1
+MAX_LOAD_FACTOR = 0.7
+
+
+def is_valid_id(emp_id: int) -> bool:
+    """True if emp_id fits the int64 ids array without colliding with the EMPTY sentinel"""
+    return EMPTY < emp_id <= MAX_ID
+
+
+def _checked_id(record: dict) -> int:
+    emp_id = int(record["id"])
+    if not is_valid_id(emp_id):
+        raise ValueError(f"employee id {emp_id} is outside the supported range ({EMPTY + 1} to {MAX_ID})")
+    return emp_id
+
+
+@njit(cache=True)
+def probe(ids, emp_id, size):
+    """Return the slot holding emp_id, else the first empty slot on its probe path, else -1 (full)"""
+    idx = emp_id % size
+    for i in range(size):
+        pos = (idx + i) % size
+        v = ids[pos]
+        if v == EMPTY or v == emp_id:
+            return pos
+    return -1
+
+
+@njit(cache=True)
+def place_sorted(ids, new_ids, size):
+    """
+    Place new_ids (sorted by home slot, none of them stored yet) into empty slots of ids
+    in one forward sweep, filling ids in place. Returns the slot chosen for each id.
+    Slots between a home and the previous placement are known to be taken, so each
+    id resumes from that cursor instead of re-probing them; only ids that run past
+    the end of the array fall back to probe() to wrap around.
+    """
+    out = np.empty(new_ids.shape[0], dtype=np.int64)
+    cursor = 0
+    for k in range(new_ids.shape[0]):
+        emp_id = new_ids[k]
+        pos = max(emp_id % size, cursor)
+        while pos < size and ids[pos] != EMPTY:
+            pos += 1
+        if pos == size:
+            pos = probe(ids, emp_id, size)
+        ids[pos] = emp_id
+        out[k] = pos
+        cursor = pos + 1
+    return out
+
+
+def trigrams(text: str) -> Set[str]:
+    """All distinct 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
 
 class HashTable:
     def __init__(self, size: int = 20):
         self.size = size
-        self.table: List[Optional[dict]] = [None] * size
+        self.version = 0  # bumped on every insert/clear, lets callers cache derived output
+        self.ids = np.full(size, EMPTY, dtype=np.int64)
+        self.records: List[Optional[dict]] = [None] * size
+        self._index: Dict[int, int] = {}  # emp_id -> slot, so replacements and hits skip probing
+        self._flat_cache: Optional[List[dict]] = None
+        self._search_cache: Optional[List[Tuple[dict, str, str, str]]] = None
+        self._pct_cache: Optional[np.ndarray] = None
+        self._trigram_cache: Optional[Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]] = None
+        self._as_list_cache: Optional[List[Optional[dict]]] = None
 
     def hash_function(self, emp_id: int) -> int:
         return emp_id % self.size
@@ -16,66 +89,196 @@ class HashTable:
     def insert(self, record: dict) -> int:
         """
         Inserts or replaces a record with same id.
+        The record is stored as-is (not copied), so callers must not mutate it afterwards;
+        the table sets its "hash_index" to the home bucket.
         Returns final index used.
+        Raises ValueError if the id is outside the int64 range (see is_valid_id).
         """
-        emp_id = int(record["id"])
-        idx = self.hash_function(emp_id)
+        emp_id = _checked_id(record)
+        pos = self._index.get(emp_id)
+        if pos is None:
+            # _index holds one entry per occupied slot
+            if len(self._index) + 1 > self.size * MAX_LOAD_FACTOR:
+                self._grow(len(self._index) + 1)
+            pos = self._place(emp_id)
+        record["hash_index"] = self.hash_function(emp_id)
+        self.records[pos] = record
+        self._invalidate()
+        return pos
 
-        for i in range(self.size):
-            pos = (idx + i) % self.size
-            slot = self.table[pos]
-            if slot is None:
-                # empty slot - place record
-                self.table[pos] = record.copy()
-                return pos
-            else:
-                # if same id, replace
-                if int(slot.get("id")) == emp_id:
-                    self.table[pos] = record.copy()
-                    return pos
-                # else continue probing
-                continue
-        # table full, raise or overwrite the original idx (we'll overwrite first slot)
-        self.table[idx] = record.copy()
-        return idx
+    def bulk_insert(self, records: List[dict]):
+        """
+        Insert or replace many records at once; same contents as calling insert() for each
+        (a repeated id keeps its last record, insertion order follows first appearance).
+        Known ids are replaced in place, new ids are placed together by place_sorted(),
+        and the table grows at most once.
+        Raises ValueError before changing anything if any id is outside the int64 range.
+        """
+        incoming: Dict[int, dict] = {}
+        for r in records:
+            incoming[_checked_id(r)] = r
+        if not incoming:
+            return
+        new_ids = [emp_id for emp_id in incoming if emp_id not in self._index]
+
+        needed = len(self._index) + len(new_ids)
+        if needed > self.size * MAX_LOAD_FACTOR:
+            self._grow(needed)
+
+        # every passed record (repeated ids included) reports the final table's home bucket
+        for r in records:
+            r["hash_index"] = self.hash_function(int(r["id"]))
+        for emp_id, r in incoming.items():
+            pos = self._index.get(emp_id)
+            if pos is not None:
+                self.records[pos] = r
+        for emp_id, pos in zip(new_ids, self._place_many(new_ids)):
+            self.records[pos] = incoming[emp_id]
+        self._invalidate()
+
+    def _place(self, emp_id: int) -> int:
+        """Claim the first empty slot on emp_id's probe path (emp_id must not be stored yet)"""
+        pos = probe(self.ids, emp_id, self.size)
+        self.ids[pos] = emp_id
+        self._index[emp_id] = pos
+        return pos
+
+    def _place_many(self, emp_ids: List[int]) -> List[int]:
+        """Like _place for several new ids at once; returns their slots in the same order"""
+        arr = np.array(emp_ids, dtype=np.int64)
+        order = np.argsort(arr % self.size, kind="stable")
+        slots = np.empty_like(arr)
+        slots[order] = place_sorted(self.ids, arr[order], self.size)
+        slots = slots.tolist()
+        self._index.update(zip(emp_ids, slots))
+        return slots
+
+    def _grow(self, needed: int):
+        """
+        Double the table until `needed` records fit under the load factor, then rehash
+        (keeps insertion order, refreshes each record's hash_index for the new size)
+        """
+        records = self.flatten()
+        while needed > self.size * MAX_LOAD_FACTOR:
+            self.size *= 2
+        self.ids = np.full(self.size, EMPTY, dtype=np.int64)
+        self.records = [None] * self.size
+        self._index = {}
+        emp_ids = [int(r["id"]) for r in records]
+        for r, emp_id, pos in zip(records, emp_ids, self._place_many(emp_ids)):
+            r["hash_index"] = self.hash_function(emp_id)
+            self.records[pos] = r
 
     def get(self, emp_id: int):
         """Return record and steps trace if found else (None, trace)"""
         idx = self.hash_function(emp_id)
+        pos = self._index.get(emp_id)
+        found = pos is not None
+        if not found:
+            if is_valid_id(emp_id):
+                pos = probe(self.ids, emp_id, self.size)
+            else:
+                # probe() only takes int64 ids; no stored id can match, so walk to the first empty slot
+                pos = next((p for p in ((idx + i) % self.size for i in range(self.size)) if self.ids[p] == EMPTY), -1)
+        # linear probing visits idx, idx+1, ... up to the slot probe() stopped at
+        steps = self.size if pos < 0 else (pos - idx) % self.size + 1
         trace = []
-        for i in range(self.size):
-            pos = (idx + i) % self.size
-            trace.append({"index": pos, "slot": self.table[pos]})
-            slot = self.table[pos]
-            if slot is None:
-                # empty slot - stop searching
-                return None, trace
-            if int(slot.get("id")) == emp_id:
-                return slot, trace
-        return None, trace
+        for i in range(steps):
+            p = (idx + i) % self.size
+            trace.append({"index": p, "slot": self.records[p]})
+        return (self.records[pos] if found else None), trace
 
     def as_list(self):
-        """Return serializable list representation of table (indexes)"""
-        out = []
-        for i, slot in enumerate(self.table):
-            if slot is None:
-                out.append(None)
-            else:
-                out.append({"index": i, "id": slot.get("id"), "name": slot.get("name"), "attendance_percentage": slot.get("attendance_percentage")})
-        return out
+        """
+        Return serializable list representation of table (indexes).
+        Cached like flatten(), so it must not be mutated.
+        """
+        if self._as_list_cache is None:
+            out = []
+            for i, slot in enumerate(self.records):
+                if slot is None:
+                    out.append(None)
+                else:
+                    out.append({"index": i, "id": slot.get("id"), "name": slot.get("name"), "attendance_percentage": slot.get("attendance_percentage")})
+            self._as_list_cache = out
+        return self._as_list_cache
 
     def flatten(self):
-        """Return list of stored records (preserves order in table)"""
-        return [slot for slot in self.table if slot is not None]
+        """
+        Return list of stored records (in insertion order).
+        The list is cached until the next insert/clear and shared between callers,
+        so it must not be mutated.
+        """
+        if self._flat_cache is None:
+            self._flat_cache = [self.records[pos] for pos in self._index.values()]
+        return self._flat_cache
+
+    def search_rows(self):
+        """
+        Return (record, id_str, name_lower, department_lower) for every stored record,
+        so searches don't re-lowercase fields on each request. Cached like flatten().
+        """
+        if self._search_cache is None:
+            self._search_cache = [
+                (r, str(r.get("id", "")), str(r.get("name", "")).lower(), str(r.get("department", "")).lower())
+                for r in self.flatten()
+            ]
+        return self._search_cache
+
+    def trigram_index(self):
+        """
+        Return (name_trigrams, department_trigrams): each maps a lowercased 3-char
+        substring to the set of search_rows() positions containing it.
+        Cached like flatten().
+        """
+        if self._trigram_cache is None:
+            name_tri: Dict[str, Set[int]] = {}
+            dept_tri: Dict[str, Set[int]] = {}
+            for i, (_, _, name_lower, dept_lower) in enumerate(self.search_rows()):
+                for t in trigrams(name_lower):
+                    name_tri.setdefault(t, set()).add(i)
+                for t in trigrams(dept_lower):
+                    dept_tri.setdefault(t, set()).add(i)
+            self._trigram_cache = (name_tri, dept_tri)
+        return self._trigram_cache
+
+    def percentages(self) -> np.ndarray:
+        """
+        Return attendance_percentage of every flatten() entry as a float32 column
+        (same order), so filters and sorts run as vector ops. Cached like flatten().
+        """
+        if self._pct_cache is None:
+            records = self.flatten()
+            self._pct_cache = np.fromiter(
+                (r.get("attendance_percentage", 0) for r in records), dtype=np.float32, count=len(records)
+            )
+        return self._pct_cache
 
     def clear(self):
-        self.table = [None] * self.size
+        self.ids = np.full(self.size, EMPTY, dtype=np.int64)
+        self.records = [None] * self.size
+        self._index = {}
+        self._invalidate()
+
+    def _invalidate(self):
+        """Bump version and drop views derived from the stored records; they are rebuilt on next use"""
+        self.version += 1
+        self._flat_cache = None
+        self._search_cache = None
+        self._pct_cache = None
+        self._trigram_cache = None
+        self._as_list_cache = None
 
 
 def rebuild_hashtable_from_list(hash_table: HashTable, records: List[dict]):
     """
     Insert a list of records into the given hash_table (clears first).
+    The dicts are stored by reference, so the table takes ownership of them.
+    Records whose id the table cannot hold (see is_valid_id) are left out and returned.
     """
-    hash_table.clear()
+    kept, skipped = [], []
     for r in records:
-        hash_table.insert(r)
+        (kept if is_valid_id(int(r["id"])) else skipped).append(r)
+    hash_table.clear()
+    hash_table.bulk_insert(kept)
+    return skipped
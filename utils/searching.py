@@ -2,9 +2,12 @@
 Searching utilities.
 - search_by_id uses hash table's get method and returns (record, trace)
 - search_by_name performs case-insensitive substring match over flattened records
+- dynamic_search narrows name/department substring matches with trigram posting lists
 """
 
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Set
+
+from utils.hashing import trigrams
 
 def search_by_id(hash_table, emp_id: int) -> Tuple[Optional[dict], List[dict]]:
     record, trace = hash_table.get(emp_id)
@@ -19,8 +22,48 @@ def search_by_name(hash_table, name: str) -> Tuple[List[dict], List[dict]]:
     name_lower = name.strip().lower()
     checked = []
     matches = []
-    for slot in hash_table.flatten():
+    for slot, _, slot_name_lower, _ in hash_table.search_rows():
         checked.append({"id": slot.get("id"), "name": slot.get("name")})
-        if name_lower in str(slot.get("name", "")).lower():
+        if name_lower in slot_name_lower:
             matches.append(slot)
     return matches, checked
+
+def _trigram_candidates(postings: dict, query: str) -> Optional[Set[int]]:
+    """
+    Row positions containing every trigram of query (a superset of the real matches).
+    Returns None when the query is shorter than 3 chars and can't narrow anything.
+    """
+    if len(query) < 3:
+        return None
+    lists = [postings.get(t) for t in trigrams(query)]
+    if not all(lists):
+        return set()
+    lists.sort(key=len)
+    return lists[0].intersection(*lists[1:])
+
+def dynamic_search(hash_table, id_query: str = "", name_query: str = "", dept_query: str = "") -> List[dict]:
+    """
+    Case-insensitive partial match on id, name and department (queries already lowercased).
+    Name/department queries of 3+ chars only check rows found in the trigram index;
+    shorter queries fall back to scanning every row.
+    """
+    rows = hash_table.search_rows()
+    name_tri, dept_tri = hash_table.trigram_index()
+
+    candidates = None
+    for postings, query in ((name_tri, name_query), (dept_tri, dept_query)):
+        found = _trigram_candidates(postings, query)
+        if found is not None:
+            candidates = found if candidates is None else candidates & found
+
+    positions = range(len(rows)) if candidates is None else sorted(candidates)
+    results = []
+    for i in positions:
+        r, id_str, name_lower, dept_lower = rows[i]
+        if (
+            (not id_query or id_query in id_str)
+            and (not name_query or name_query in name_lower)
+            and (not dept_query or dept_query in dept_lower)
+        ):
+            results.append(r)
+    return results
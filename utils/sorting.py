@@ -2,10 +2,18 @@
 Sorting utilities.
 """
 
-def sort_employees_by_percentage(records: list, order: str = "asc") -> list:
+import numpy as np
+
+def sort_employees_by_percentage(records: list, order: str = "asc", percentages=None) -> list:
     """
     Sort by 'attendance_percentage'. order : 'asc' or 'desc'
-    Returns a new sorted list.
+    percentages : optional precomputed column aligned with records (e.g. HashTable.percentages())
+    Returns a new sorted list (stable, equal percentages keep their input order).
     """
-    reverse = (order == "desc")
-    return sorted(records, key=lambda x: x.get("attendance_percentage", 0), reverse=reverse)
+    pct = percentages
+    if pct is None:
+        pct = np.fromiter((r.get("attendance_percentage", 0) for r in records), dtype=np.float32, count=len(records))
+    if order == "desc":
+        pct = -pct
+    order_idx = np.argsort(pct, kind="stable")
+    return [records[i] for i in order_idx.tolist()]